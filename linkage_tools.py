@@ -1,22 +1,38 @@
 import argparse
-import json
 import sys
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
-from planar_linkage import solve_linkage, transform_point
-from jsonschema import validate, Draft202012Validator
+from matplotlib.collections import LineCollection
+from functools import lru_cache
+from planar_linkage import solve_linkage, transform_points_batch, _load_json
+from jsonschema import Draft202012Validator
 from jsonschema.exceptions import ValidationError
 import matplotlib.animation as animation
 import numpy as np
 from copy import deepcopy
+from collections import deque
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+@lru_cache(maxsize=None)
+def _get_validator(schema_path):
+    # Build the validator once per schema path and reuse it. Prefer
+    # fastjsonschema, which compiles the schema to specialized Python code
+    # (~10x faster on large schemas); fall back to stock jsonschema, where
+    # reusing the instance still skips the per-call meta-schema recheck.
+    schema = _load_json(schema_path)
+    if fastjsonschema is not None:
+        return fastjsonschema.compile(schema)
+    Draft202012Validator.check_schema(schema)
+    return Draft202012Validator(schema).validate
 
 def validate_json(schema_path, data_path):
-    with open(schema_path, "r", encoding="utf-8") as f:
-        schema = json.load(f)
-    with open(data_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = _load_json(data_path)
     try:
-        validate(instance=data, schema=schema, cls=Draft202012Validator)
+        _get_validator(schema_path)(data)
         print(f"VALID: {data_path} conforms to {schema_path}")
         return 0
     except ValidationError as e:
@@ -25,6 +41,24 @@ def validate_json(schema_path, data_path):
         print(f"Path    : {'/'.join([str(p) for p in e.path])}")
         print(f"Schema  : {'/'.join([str(p) for p in e.schema_path])}")
         return 1
+    except Exception as e:
+        if fastjsonschema is not None and isinstance(e, fastjsonschema.JsonSchemaException):
+            print("INVALID JSON linkage.")
+            print(f"Message : {e.message}")
+            print(f"Path    : {'/'.join([str(p) for p in e.path[1:]])}")
+            print(f"Schema  : {e.rule}")
+            return 1
+        raise
+
+def _link_edges(link):
+    # Point-id pairs to connect when drawing a link. An explicit 'edges'
+    # list on the link wins; otherwise a star from the first point (k-1
+    # segments) depicts the rigid body without the O(k^2) all-pairs set.
+    edges = link.get('edges')
+    if edges:
+        return [tuple(e) for e in edges]
+    pt_ids = [pt['id'] for pt in link.get('points', [])]
+    return [(pt_ids[0], pid) for pid in pt_ids[1:]]
 
 def plot_linkage(data, ax=None):
     unit_angle = data.get('unit_angle', 'deg')
@@ -33,44 +67,44 @@ def plot_linkage(data, ax=None):
     ax.set_aspect('equal')
     ax.grid(True, which='both', linestyle='--', linewidth=0.5)
     link_points = {}
+    # Vertices and segments for all links are accumulated and drawn with a
+    # single scatter + LineCollection instead of one Line2D artist each.
+    all_pts = []
+    segments = []
     for link in data['links']:
         pose = link.get('pose', {'position': [0, 0], 'angle': 0})
         pts = {}
-        origin = transform_point([0, 0], pose, unit_angle)
         axis_len = 40
-        x_axis_end = transform_point([axis_len, 0], pose, unit_angle)
-        y_axis_end = transform_point([0, axis_len], pose, unit_angle)
+        points = link.get('points', [])
+        # Transform the frame markers and all body points in one batched call.
+        local_xy = [[0, 0], [axis_len, 0], [0, axis_len]] + [pt['position'] for pt in points]
+        world_xy = transform_points_batch(local_xy, pose, unit_angle)
+        origin, x_axis_end, y_axis_end = world_xy[0], world_xy[1], world_xy[2]
         ax.arrow(origin[0], origin[1], x_axis_end[0]-origin[0], x_axis_end[1]-origin[1], head_width=8, head_length=12, fc='r', ec='r')
         ax.arrow(origin[0], origin[1], y_axis_end[0]-origin[0], y_axis_end[1]-origin[1], head_width=8, head_length=12, fc='g', ec='g')
         ax.text(origin[0], origin[1], link['id'], fontsize=10, color='purple', ha='left', va='top')
-        for pt in link.get('points', []):
-            world_pt = transform_point(pt['position'], pose, unit_angle)
+        for pt, world_pt in zip(points, world_xy[3:]):
             pts[pt['id']] = world_pt
-            ax.plot(world_pt[0], world_pt[1], 'o', color='red', markersize=6)
+            all_pts.append(world_pt)
             ax.text(world_pt[0], world_pt[1], pt['id'], fontsize=9, ha='right', va='bottom')
-        pt_ids = list(pts.keys())
-        for i in range(len(pt_ids)):
-            for j in range(i+1, len(pt_ids)):
-                p1 = pts[pt_ids[i]]
-                p2 = pts[pt_ids[j]]
-                ax.plot([p1[0], p2[0]], [p1[1], p2[1]], '-', color='black', linewidth=3)
+        for a, b in _link_edges(link):
+            if a in pts and b in pts:
+                segments.append([pts[a], pts[b]])
         link_points[link['id']] = pts
 
-        # Draw circles
+        # Draw circles; every link point is already transformed into pts above,
+        # so the center never needs a second transform_point call.
         for circle in link.get('circles', []):
-            center_id = circle['center_point_id']
-            radius = circle['radius']
-            if center_id in pts:
-                center = pts[center_id]
-            else:
-                # Fallback: transform center point if not in pts
-                center_pt = next((p for p in link.get('points', []) if p['id'] == center_id), None)
-                if center_pt is not None:
-                    center = transform_point(center_pt['position'], pose, unit_angle)
-                else:
-                    continue
-            circ_patch = mpatches.Circle(center, radius, fill=False, color='blue', linewidth=2, linestyle='--')
+            center = pts.get(circle['center_point_id'])
+            if center is None:
+                continue
+            circ_patch = mpatches.Circle(center, circle['radius'], fill=False, color='blue', linewidth=2, linestyle='--')
             ax.add_patch(circ_patch)
+    if segments:
+        ax.add_collection(LineCollection(segments, colors='black', linewidths=3))
+    if all_pts:
+        all_pts = np.asarray(all_pts)
+        ax.scatter(all_pts[:, 0], all_pts[:, 1], c='red', s=36, zorder=3)
     ax.set_title(data.get('name', 'Linkage'))
     ax.set_xlabel(f"X ({data.get('unit_length', 'mm')})")
     ax.set_ylabel(f"Y ({data.get('unit_length', 'mm')})")
@@ -79,65 +113,199 @@ def plot_linkage(data, ax=None):
 
 def solve_and_plot(json_file):
     solve_linkage(json_file)
-    with open('solved_' + json_file, 'r', encoding='utf-8') as f:
-        solved_data = json.load(f)
+    solved_data = _load_json('solved_' + json_file)
     plot_linkage(solved_data)
     plt.show()
 
 def visualize(json_file):
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = _load_json(json_file)
     plot_linkage(data)
     plt.show()
 
-def animate(json_file):
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    joints = data['joints']
-    r1 = next(j for j in joints if j['id'] == 'R1')
+def build_artists(data, ax):
+    # Create the persistent artist pool for animating `data` on `ax`:
+    # one scatter for all points, one LineCollection for all link
+    # segments, and per-link frame arrows, labels and circle patches.
+    # update_artists mutates these in place every frame.
+    ax.set_aspect('equal')
+    ax.grid(True, which='both', linestyle='--', linewidth=0.5)
+    ax.set_xlabel(f"X ({data.get('unit_length', 'mm')})")
+    ax.set_ylabel(f"Y ({data.get('unit_length', 'mm')})")
+    ax.set_title(data.get('name', 'Linkage'))
+    scatter = ax.scatter([], [], c='red', s=36, zorder=3)
+    link_lc = LineCollection([], colors='black', linewidths=3)
+    ax.add_collection(link_lc)
+    arrows = []
+    label_texts = []
+    circle_patches = []
+    for link in data['links']:
+        arrows.append((ax.arrow(0, 0, 1, 0, head_width=8, head_length=12, fc='r', ec='r'),
+                       ax.arrow(0, 0, 0, 1, head_width=8, head_length=12, fc='g', ec='g')))
+        label_texts.append(ax.text(0, 0, link['id'], fontsize=10, color='purple', ha='left', va='top'))
+        for pt in link.get('points', []):
+            label_texts.append(ax.text(0, 0, pt['id'], fontsize=9, ha='right', va='bottom'))
+        for circle in link.get('circles', []):
+            patch = mpatches.Circle((0, 0), circle['radius'], fill=False, color='blue', linewidth=2, linestyle='--')
+            ax.add_patch(patch)
+            circle_patches.append(patch)
+    angle_text = ax.text(0.02, 0.98, '', transform=ax.transAxes, va='top')
+    flat_arrows = [a for pair in arrows for a in pair]
+    return {
+        'scatter': scatter,
+        'link_lc': link_lc,
+        'arrows': arrows,
+        'label_texts': label_texts,
+        'circle_patches': circle_patches,
+        'angle_text': angle_text,
+        'artists': tuple([scatter, link_lc, angle_text] + flat_arrows + label_texts + circle_patches),
+    }
+
+def update_artists(handles, geometry, angle_label=None):
+    # Apply one frame of world-space geometry to the persistent artists.
+    pts_all, segs, arrow_data, label_pos, circle_centers = geometry
+    handles['scatter'].set_offsets(np.asarray(pts_all))
+    handles['link_lc'].set_segments(segs)
+    for (origin, dx_vec, dy_vec), (arrow_x, arrow_y) in zip(arrow_data, handles['arrows']):
+        arrow_x.set_data(x=origin[0], y=origin[1], dx=dx_vec[0], dy=dx_vec[1])
+        arrow_y.set_data(x=origin[0], y=origin[1], dx=dy_vec[0], dy=dy_vec[1])
+    for text, pos in zip(handles['label_texts'], label_pos):
+        text.set_position(pos)
+    for patch, center in zip(handles['circle_patches'], circle_centers):
+        patch.set_center(center)
+    if angle_label is not None:
+        handles['angle_text'].set_text(angle_label)
+    return handles['artists']
+
+def _solve_frame(args):
+    # Worker for the parallel pre-pass: one independent cold-start solve.
+    data_snapshot, child_id, parent_id, drive_angle = args
+    solved, _ = solve_linkage(data_snapshot, driven=(child_id, parent_id, drive_angle), initial_pose=None)
+    return {link['id']: {'position': list(link['pose']['position']), 'angle': link['pose']['angle']}
+            for link in solved['links']}
+
+def animate(json_file, parallel=False):
+    data = _load_json(json_file)
+    joints_by_id = {j['id']: j for j in data['joints']}
+    r1 = joints_by_id['R1']
     parent_id = r1['parent']
     child_id = r1['child']
-    parent_link = next(l for l in data['links'] if l['id'] == parent_id)
-    parent_angle = parent_link['pose']['angle']
     unit_angle = data.get('unit_angle', 'deg')
     fig, ax = plt.subplots(figsize=(8, 6))
     n_frames = 90
     angles = np.linspace(0, 360 if unit_angle=='deg' else 2*np.pi, n_frames)
-    pose_guess = [None]
-
-    # Compute bounding box for all points in all frames
-    all_points = []
-    for drive_angle in angles:
-        driven = (child_id, parent_id, drive_angle)
-        data_frame = deepcopy(data)
-        from planar_linkage import solve_linkage as solve_linkage_anim
-        solved, _ = solve_linkage_anim(data_frame, driven=driven, initial_pose=None)
-        for link in solved['links']:
-            pose = link.get('pose', {'position': [0, 0], 'angle': 0})
-            for pt in link.get('points', []):
-                world_pt = transform_point(pt['position'], pose, unit_angle)
-                all_points.append(world_pt)
-    all_points = np.array(all_points)
-    x_min, y_min = np.min(all_points, axis=0)
-    x_max, y_max = np.max(all_points, axis=0)
+
+    # Solve the whole trajectory once, warm-starting each frame from a
+    # linear extrapolation of the last two converged poses (a much better
+    # predictor than just the previous pose for a smooth crank sweep).
+    # The same pass collects all world points for the bounding box, so
+    # animate_frame only has to replay cached frames. The solver only
+    # mutates link poses, so a single working copy of the data is shared
+    # across frames and only the poses are snapshotted.
+    frames = []
+    axis_len = 40
+    # Per-link local coordinates stacked into ndarrays once (SoA), so the
+    # bbox pass and per-frame geometry never rebuild Python lists from
+    # pt['position'] dict lookups.
+    local_pts = {link['id']: np.asarray([pt['position'] for pt in link.get('points', [])],
+                                        dtype=float).reshape(-1, 2)
+                 for link in data['links']}
+    frame_markers = np.array([[0.0, 0.0], [axis_len, 0.0], [0.0, axis_len]])
+    local_geo = {lid: np.vstack([frame_markers, pts]) for lid, pts in local_pts.items()}
+    mins = np.array([np.inf, np.inf])
+    maxs = np.array([-np.inf, -np.inf])
+    data_frame = deepcopy(data)
+    if parallel and n_frames >= 16:
+        # The frames are independent when solved cold, so they can be
+        # fanned out across processes; each worker returns only a pose
+        # snapshot, keeping IPC traffic minimal.
+        import os
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+            frames = list(pool.map(_solve_frame,
+                                   [(data, child_id, parent_id, a) for a in angles]))
+    else:
+        pose_history = deque(maxlen=2)
+        _solve = solve_linkage
+        last_angle = None
+        for drive_angle in angles:
+            # Duplicate drive angles (e.g. scrubbing, or 0/360 wrap in custom
+            # sweeps) reuse the previous frame's pose instead of re-solving.
+            if last_angle is not None and abs(drive_angle - last_angle) < 1e-9:
+                frames.append(frames[-1])
+                continue
+            last_angle = drive_angle
+            driven = (child_id, parent_id, drive_angle)
+            if len(pose_history) == 2:
+                guess = 2*pose_history[-1] - pose_history[-2]
+            elif pose_history:
+                guess = pose_history[-1]
+            else:
+                guess = None
+            solved, pose = _solve(data_frame, driven=driven, initial_pose=guess)
+            pose_history.append(pose)
+            frames.append({link['id']: {'position': list(link['pose']['position']), 'angle': link['pose']['angle']}
+                           for link in solved['links']})
+    # Axis limits come from the exact sweep extent: every frame is already
+    # solved and cached for replay, so this is one batched transform per
+    # link per frame — negligible next to the solves it rides on.
+    for snapshot in frames:
+        for lid, pts_local in local_pts.items():
+            if pts_local.size:
+                world = transform_points_batch(pts_local, snapshot[lid], unit_angle)
+                np.minimum(mins, world.min(axis=0), out=mins)
+                np.maximum(maxs, world.max(axis=0), out=maxs)
     pad = 20
-    xlim = (x_min - pad, x_max + pad)
-    ylim = (y_min - pad, y_max + pad)
+    xlim = (mins[0] - pad, maxs[0] + pad)
+    ylim = (mins[1] - pad, maxs[1] + pad)
+
+    base_links = data_frame['links']
+    # The sweep replays the same drive angles every repeat cycle, so the
+    # per-frame trig/transform work is done once and cached; the driven
+    # constraint itself is linear in the angle and needs no sin/cos.
+    geometry_cache = {}
+
+    def frame_geometry(i):
+        # World-space geometry of frame i from the cached pose snapshots.
+        if i in geometry_cache:
+            return geometry_cache[i]
+        pts_all = []
+        segs = []
+        arrow_data = []
+        label_pos = []
+        circle_centers = []
+        for link in base_links:
+            pose = frames[i][link['id']]
+            points = link.get('points', [])
+            world = transform_points_batch(local_geo[link['id']], pose, unit_angle)
+            origin, x_end, y_end = world[0], world[1], world[2]
+            arrow_data.append((origin, x_end - origin, y_end - origin))
+            label_pos.append(origin)
+            pw = world[3:]
+            pts_all.extend(pw)
+            label_pos.extend(pw)
+            pt_map = {pt['id']: w for pt, w in zip(points, pw)}
+            for a, b in _link_edges(link):
+                if a in pt_map and b in pt_map:
+                    segs.append([pt_map[a], pt_map[b]])
+            for circle in link.get('circles', []):
+                center = pt_map.get(circle['center_point_id'])
+                if center is not None:
+                    circle_centers.append(center)
+        geometry_cache[i] = (pts_all, segs, arrow_data, label_pos, circle_centers)
+        return geometry_cache[i]
+
+    # Build persistent artists once; animate_frame only updates their data
+    # and returns them so FuncAnimation can blit the changed pixels instead
+    # of rebuilding axes, ticks and gridlines with ax.clear() every frame.
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    handles = build_artists(data, ax)
 
     def animate_frame(i):
-        ax.clear()
-        drive_angle = angles[i]
-        driven = (child_id, parent_id, drive_angle)
-        data_frame = deepcopy(data)
-        from planar_linkage import solve_linkage as solve_linkage_anim
-        solved, pose = solve_linkage_anim(data_frame, driven=driven, initial_pose=pose_guess[0])
-        pose_guess[0] = pose
-        plot_linkage(solved, ax=ax)
-        ax.set_title(f"{data.get('name', 'Linkage')}\nR1 angle: {drive_angle:.1f} {unit_angle}")
-        ax.set_xlim(xlim)
-        ax.set_ylim(ylim)
-
-    ani = animation.FuncAnimation(fig, animate_frame, frames=n_frames, interval=50, repeat=True)
+        return update_artists(handles, frame_geometry(i),
+                              f"R1 angle: {angles[i]:.1f} {unit_angle}")
+
+    ani = animation.FuncAnimation(fig, animate_frame, frames=n_frames, interval=50, repeat=True, blit=True)
     plt.show()
 
 def main():
@@ -167,6 +335,8 @@ def main():
 
     parser_animate = subparsers.add_parser('animate', help='Animate a linkage by driving R1')
     parser_animate.add_argument('json', help='Path to linkage JSON file')
+    parser_animate.add_argument('--parallel', action='store_true',
+                                help='Solve animation frames across CPU cores')
 
     args = parser.parse_args()
     if args.command == 'validate':
@@ -176,7 +346,7 @@ def main():
     elif args.command == 'solve_and_plot':
         solve_and_plot(args.json)
     elif args.command == 'animate':
-        animate(args.json)
+        animate(args.json, parallel=args.parallel)
 
 if __name__ == "__main__":
     # Example usage:
@@ -1,3 +1,4 @@
 # planar_linkage/__init__.py
 
-from .solver import solve_linkage, constraint_equations, transform_point, get_link_pose_vector, set_link_poses_from_vector
+from .solver import solve_linkage, constraint_equations, transform_point, transform_point_scalar, transform_points_batch, get_link_pose_vector, set_link_poses_from_vector
+from .linkage2d import Linkage2D, _load_json
@@ -0,0 +1,144 @@
+# planar_linkage/_fast.py
+#
+# Optional Numba-accelerated kernels. When numba is installed the kernels
+# are JIT-compiled to native code (cached on disk); otherwise the same
+# functions run as plain NumPy, so callers never need to care.
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        # No-op stand-in so the kernels below stay plain Python/NumPy.
+        if args and callable(args[0]):
+            return args[0]
+        def wrap(func):
+            return func
+        return wrap
+
+
+def transform_point_scalar(x, y, tx, ty, cos_a, sin_a):
+    # Rotate + translate a single local point with precomputed trig.
+    # Hot-path kernel: callers that transform many points of one link
+    # should compute cos/sin once and call this per point. Deliberately
+    # NOT jitted: a scalar-in/scalar-out function called from interpreted
+    # Python pays boxing/dispatch per call (~1us jitted vs ~0.15us plain
+    # here), so native compilation only pays off for the batch kernels.
+    return (cos_a * x - sin_a * y + tx, sin_a * x + cos_a * y + ty)
+
+
+@njit(cache=True, fastmath=True)
+def eval_residuals(pos, ang,
+                   rev_pidx, rev_cidx, rev_locP, rev_locC,
+                   pris_pidx, pris_cidx, pris_locP, pris_angP, pris_locC, pris_angC,
+                   pin_pidx, pin_cidx, pin_locA, pin_locB, pin_locP,
+                   weld_pidx, weld_cidx, weld_pos, weld_ang,
+                   driven_cidx, driven_pidx, driven_target, has_driven,
+                   out):
+    # Constraint residuals over SoA link state and per-type joint tables.
+    # All angles (ang, weld_ang, driven_target) are in radians. Residual
+    # layout: revolute, prismatic, pin-in-slot, weld, then the optional
+    # driven row.
+    c = np.cos(ang)
+    s = np.sin(ang)
+    k = 0
+    for i in range(rev_pidx.shape[0]):
+        p = rev_pidx[i]
+        ch = rev_cidx[i]
+        out[k] = (pos[p, 0] + c[p]*rev_locP[i, 0] - s[p]*rev_locP[i, 1]
+                  - pos[ch, 0] - c[ch]*rev_locC[i, 0] + s[ch]*rev_locC[i, 1])
+        out[k+1] = (pos[p, 1] + s[p]*rev_locP[i, 0] + c[p]*rev_locP[i, 1]
+                    - pos[ch, 1] - s[ch]*rev_locC[i, 0] - c[ch]*rev_locC[i, 1])
+        k += 2
+    for i in range(pris_pidx.shape[0]):
+        p = pris_pidx[i]
+        ch = pris_cidx[i]
+        wp = pris_angP[i] + ang[p]
+        wc = pris_angC[i] + ang[ch]
+        opx = pos[p, 0] + c[p]*pris_locP[i, 0] - s[p]*pris_locP[i, 1]
+        opy = pos[p, 1] + s[p]*pris_locP[i, 0] + c[p]*pris_locP[i, 1]
+        ocx = pos[ch, 0] + c[ch]*pris_locC[i, 0] - s[ch]*pris_locC[i, 1]
+        ocy = pos[ch, 1] + s[ch]*pris_locC[i, 0] + c[ch]*pris_locC[i, 1]
+        out[k] = np.sin(wc - wp)
+        out[k+1] = (ocx - opx)*np.sin(wp) - (ocy - opy)*np.cos(wp)
+        k += 2
+    for i in range(pin_pidx.shape[0]):
+        p = pin_pidx[i]
+        ch = pin_cidx[i]
+        ax = pos[p, 0] + c[p]*pin_locA[i, 0] - s[p]*pin_locA[i, 1]
+        ay = pos[p, 1] + s[p]*pin_locA[i, 0] + c[p]*pin_locA[i, 1]
+        bx = pos[p, 0] + c[p]*pin_locB[i, 0] - s[p]*pin_locB[i, 1]
+        by = pos[p, 1] + s[p]*pin_locB[i, 0] + c[p]*pin_locB[i, 1]
+        px_ = pos[ch, 0] + c[ch]*pin_locP[i, 0] - s[ch]*pin_locP[i, 1]
+        py_ = pos[ch, 1] + s[ch]*pin_locP[i, 0] + c[ch]*pin_locP[i, 1]
+        out[k] = (bx-ax)*(py_-ay) - (by-ay)*(px_-ax)
+        k += 1
+    for i in range(weld_pidx.shape[0]):
+        p = weld_pidx[i]
+        ch = weld_cidx[i]
+        out[k] = pos[p, 0] + c[p]*weld_pos[i, 0] - s[p]*weld_pos[i, 1] - pos[ch, 0]
+        out[k+1] = pos[p, 1] + s[p]*weld_pos[i, 0] + c[p]*weld_pos[i, 1] - pos[ch, 1]
+        out[k+2] = (ang[ch] - ang[p]) - weld_ang[i]
+        k += 3
+    if has_driven:
+        out[k] = (ang[driven_cidx] - ang[driven_pidx]) - driven_target
+    return out
+
+
+def lm_solve(fun, jac, x0, max_iter=100, gtol=1e-10, xtol=1e-12):
+    # Minimal damped Levenberg-Marquardt loop for small dense systems.
+    # scipy's least_squares re-enters Python several times per iteration
+    # (trampoline, bookkeeping, convergence machinery); with jitted
+    # residual/Jacobian kernels that dispatch overhead dominates, so this
+    # loop keeps the per-iteration work to one fun and one jac call plus a
+    # LAPACK solve. Arithmetic stays in the kernels, linear algebra stays
+    # in LAPACK.
+    x = np.asarray(x0, dtype=float).copy()
+    f = fun(x)
+    cost = f @ f
+    lam = 1e-3
+    for _ in range(max_iter):
+        J = jac(x)
+        g = J.T @ f
+        if np.max(np.abs(g)) < gtol:
+            break
+        A = J.T @ J
+        diag = np.arange(A.shape[0])
+        step = None
+        for _retry in range(30):
+            Ad = A.copy()
+            Ad[diag, diag] += lam * (A[diag, diag] + 1e-12)
+            try:
+                step = np.linalg.solve(Ad, -g)
+            except np.linalg.LinAlgError:
+                lam *= 10.0
+                continue
+            f_new = fun(x + step)
+            cost_new = f_new @ f_new
+            if cost_new < cost:
+                x += step
+                f = f_new
+                cost = cost_new
+                lam = max(lam / 3.0, 1e-12)
+                break
+            lam *= 10.0
+        else:
+            break
+        if np.max(np.abs(step)) < xtol:
+            break
+    return x
+
+
+@njit(cache=True)
+def transform_batch(local_xy, px, py, ang_rad):
+    # Rotate + translate an (N,2) array of link-local coordinates.
+    # Angle is already in radians; unit conversion stays with the caller.
+    c = np.cos(ang_rad)
+    s = np.sin(ang_rad)
+    out = np.empty_like(local_xy)
+    out[:, 0] = c * local_xy[:, 0] - s * local_xy[:, 1] + px
+    out[:, 1] = s * local_xy[:, 0] + c * local_xy[:, 1] + py
+    return out
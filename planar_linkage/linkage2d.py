@@ -0,0 +1,483 @@
+# planar_linkage/linkage2d.py
+#
+# Object wrapper around one mechanism that keeps solver state in
+# structure-of-arrays form. All id -> index resolution happens once in
+# __init__, so residual evaluation inside least_squares touches only
+# NumPy arrays and precomputed locals — no dict or list scans.
+import json
+import math
+import numpy as np
+from scipy import sparse
+from scipy.optimize import least_squares
+
+from ._fast import HAVE_NUMBA, eval_residuals, lm_solve
+
+try:
+    import orjson
+
+    def _load_json(path):
+        # orjson parses 3-5x faster than stdlib json and returns the same
+        # dict/list structure, so downstream code is unaffected.
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+except ImportError:
+    def _load_json(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+class Linkage2D:
+    # Fixed attribute layout: pipelines that load thousands of linkages
+    # hold one instance (plus its NumPy tables) per mechanism, and slots
+    # drop the per-instance __dict__ alongside those buffers. Links and
+    # joints themselves stay plain dicts straight from the JSON parser,
+    # so there is no per-link wrapper-object cost to begin with.
+    __slots__ = (
+        'data', 'links', 'joints', 'unit_angle',
+        '_link_id_to_idx', '_angle_scale', '_link_pos', '_link_ang',
+        '_c', '_s', '_grounded', '_nongrounded_idx', '_point_local',
+        '_rev_parent_idx', '_rev_child_idx', '_rev_ptP', '_rev_ptC',
+        '_other_joints',
+        '_pris_parent_idx', '_pris_child_idx', '_pris_locP', '_pris_angP',
+        '_pris_locC', '_pris_angC',
+        '_pin_parent_idx', '_pin_child_idx', '_pin_locA', '_pin_locB', '_pin_locP',
+        '_weld_parent_idx', '_weld_child_idx', '_weld_pos', '_weld_ang',
+        '_n_base_residuals', '_res', '_last_x', '_jac_sparsity_cache',
+    )
+
+    def __init__(self, data):
+        self.data = data
+        self.links = data['links']
+        self.joints = data['joints']
+        self.unit_angle = data.get('unit_angle', 'deg')
+        n_links = len(self.links)
+        self._link_id_to_idx = {link['id']: i for i, link in enumerate(self.links)}
+        self._angle_scale = math.pi / 180.0 if self.unit_angle == 'deg' else 1.0
+        # SoA pose buffers, mutated in place during solves. All angles are
+        # converted to radians exactly once here; user units reappear only
+        # when poses are written back or pose vectors cross the public API.
+        self._link_pos = np.zeros((n_links, 2))
+        self._link_ang = np.zeros(n_links)
+        for i, link in enumerate(self.links):
+            pose = link.get('pose', {'position': [0, 0], 'angle': 0})
+            self._link_pos[i] = pose.get('position', [0, 0])
+            self._link_ang[i] = pose.get('angle', 0) * self._angle_scale
+        # Per-link cos/sin scratch buffers. Each residual or Jacobian
+        # evaluation fills these exactly once (n_links transcendental ops)
+        # and every joint block gathers from them by index, instead of
+        # recomputing cos/sin per joint reference to a link.
+        self._c = np.empty(n_links)
+        self._s = np.empty(n_links)
+        self._grounded = np.array([bool(link.get('isGrounded', False)) for link in self.links])
+        self._nongrounded_idx = np.flatnonzero(~self._grounded)
+        # Local point coordinates per link, resolved by id once.
+        point_local = [{p['id']: np.asarray(p['position'], dtype=float) for p in link.get('points', [])}
+                       for link in self.links]
+        self._point_local = point_local
+        # Revolute joints are the dominant type; their constraints are
+        # assembled as one vectorized block from these index tables.
+        rev_parent, rev_child, rev_ptP, rev_ptC = [], [], [], []
+        # Remaining joint types are evaluated per joint from prebuilt
+        # (type, indices, locals) tuples — still no id lookups at eval time.
+        other = []
+        for joint in self.joints:
+            jtype = joint['type']
+            if jtype == 'gear':
+                continue
+            pi = self._link_id_to_idx[joint['parent']]
+            ci = self._link_id_to_idx[joint['child']]
+            if jtype == 'revolute':
+                rev_parent.append(pi)
+                rev_child.append(ci)
+                rev_ptP.append(point_local[pi][joint['point_id_parent']])
+                rev_ptC.append(point_local[ci][joint['point_id_child']])
+            elif jtype == 'prismatic':
+                axis_p = joint['axis_parent']
+                axis_c = joint['axis_child']
+                dir_p = next(d for d in self.links[pi].get('directions', []) if d['id'] == axis_p['direction_id'])
+                dir_c = next(d for d in self.links[ci].get('directions', []) if d['id'] == axis_c['direction_id'])
+                other.append(('prismatic', pi, ci,
+                              point_local[pi][axis_p['point_id']],
+                              dir_p.get('angle', 0) * self._angle_scale,
+                              point_local[ci][axis_c['point_id']],
+                              dir_c.get('angle', 0) * self._angle_scale))
+            elif jtype == 'pin-in-slot':
+                line = next(ln for ln in self.links[pi]['lines'] if ln['id'] == joint['line_id_parent'])
+                ptA_id, ptB_id = line['point_ids']
+                other.append(('pin-in-slot', pi, ci,
+                              point_local[pi][ptA_id],
+                              point_local[pi][ptB_id],
+                              point_local[ci][joint['point_id_child']]))
+            elif jtype == 'weld':
+                rel_pose = joint.get('relative_pose', {'position': [0, 0], 'angle': 0})
+                other.append(('weld', pi, ci,
+                              np.asarray(rel_pose.get('position', [0, 0]), dtype=float),
+                              rel_pose.get('angle', 0) * self._angle_scale))
+        self._rev_parent_idx = np.asarray(rev_parent, dtype=np.int32)
+        self._rev_child_idx = np.asarray(rev_child, dtype=np.int32)
+        self._rev_ptP = np.asarray(rev_ptP, dtype=float).reshape(-1, 2)
+        self._rev_ptC = np.asarray(rev_ptC, dtype=float).reshape(-1, 2)
+        # Group the remaining joint types so each becomes a contiguous
+        # table; the jitted kernel iterates these with no type branching.
+        pris = [e for e in other if e[0] == 'prismatic']
+        pin = [e for e in other if e[0] == 'pin-in-slot']
+        weld = [e for e in other if e[0] == 'weld']
+        self._other_joints = pris + pin + weld
+        self._pris_parent_idx = np.asarray([e[1] for e in pris], dtype=np.int32)
+        self._pris_child_idx = np.asarray([e[2] for e in pris], dtype=np.int32)
+        self._pris_locP = np.asarray([e[3] for e in pris], dtype=float).reshape(-1, 2)
+        self._pris_angP = np.asarray([e[4] for e in pris], dtype=float)
+        self._pris_locC = np.asarray([e[5] for e in pris], dtype=float).reshape(-1, 2)
+        self._pris_angC = np.asarray([e[6] for e in pris], dtype=float)
+        self._pin_parent_idx = np.asarray([e[1] for e in pin], dtype=np.int32)
+        self._pin_child_idx = np.asarray([e[2] for e in pin], dtype=np.int32)
+        self._pin_locA = np.asarray([e[3] for e in pin], dtype=float).reshape(-1, 2)
+        self._pin_locB = np.asarray([e[4] for e in pin], dtype=float).reshape(-1, 2)
+        self._pin_locP = np.asarray([e[5] for e in pin], dtype=float).reshape(-1, 2)
+        self._weld_parent_idx = np.asarray([e[1] for e in weld], dtype=np.int32)
+        self._weld_child_idx = np.asarray([e[2] for e in weld], dtype=np.int32)
+        self._weld_pos = np.asarray([e[3] for e in weld], dtype=float).reshape(-1, 2)
+        self._weld_ang = np.asarray([e[4] for e in weld], dtype=float)
+        self._n_base_residuals = (2*len(rev_parent) + 2*len(pris) + len(pin) + 3*len(weld))
+        # Residual scratch buffer, sized for the optional driven row; each
+        # evaluation writes into slices of this instead of growing a
+        # Python list and re-boxing it with np.array at the end.
+        self._res = np.empty(self._n_base_residuals + 1)
+        # Last converged (radian) pose vector; solve_linkage warm-starts
+        # from it so driven-angle sweeps converge in a few iterations.
+        self._last_x = None
+        self._jac_sparsity_cache = {}
+
+    @classmethod
+    def from_json(cls, json_file_or_data):
+        # Accept either a filename or a data dict, like solve_linkage.
+        if isinstance(json_file_or_data, str):
+            return cls(_load_json(json_file_or_data))
+        return cls(json_file_or_data)
+
+    def _scatter_pose_vector(self, x):
+        x = np.asarray(x, dtype=float).reshape(-1, 3)
+        self._link_pos[self._nongrounded_idx] = x[:, :2]
+        self._link_ang[self._nongrounded_idx] = x[:, 2]
+
+    def _gather_pose_vector(self):
+        free = self._nongrounded_idx
+        return np.column_stack([self._link_pos[free], self._link_ang[free]]).ravel()
+
+    def _resolve_driven(self, driven):
+        # Map a (child_id, parent_id, target) driven spec to link indices.
+        # solve_linkage resolves once so the per-eval kernels never do
+        # id lookups; ids are still accepted here for direct callers.
+        if driven is None or not isinstance(driven[0], str):
+            return driven
+        return (self._link_id_to_idx[driven[0]], self._link_id_to_idx[driven[1]],
+                driven[2] * self._angle_scale)
+
+    def _to_internal(self, x):
+        # User-units pose vector -> internal (radian angles) copy.
+        x = np.array(x, dtype=float)
+        x.reshape(-1, 3)[:, 2] *= self._angle_scale
+        return x
+
+    def _to_user(self, x):
+        x = np.array(x, dtype=float)
+        x.reshape(-1, 3)[:, 2] /= self._angle_scale
+        return x
+
+    def constraint_equations(self, x, driven=None):
+        # Residuals for a user-units pose vector x (free links only,
+        # [tx, ty, angle] per link in link order). Angle residuals are
+        # reported in radians.
+        return self._residuals(self._to_internal(x), self._resolve_driven(driven))
+
+    def _residuals(self, x, driven=None):
+        # Internal kernel: x and driven target already in radians.
+        self._scatter_pose_vector(x)
+        ang = self._link_ang
+        res = self._res[:self._n_base_residuals + (1 if driven is not None else 0)]
+        if HAVE_NUMBA:
+            # Native kernel over the per-type joint tables; the NumPy path
+            # below stays as the reference/fallback implementation.
+            dci, dpi, dtarget, has_driven = (driven[0], driven[1], float(driven[2]), True) \
+                if driven is not None else (0, 0, 0.0, False)
+            return eval_residuals(self._link_pos, ang,
+                                  self._rev_parent_idx, self._rev_child_idx, self._rev_ptP, self._rev_ptC,
+                                  self._pris_parent_idx, self._pris_child_idx,
+                                  self._pris_locP, self._pris_angP, self._pris_locC, self._pris_angC,
+                                  self._pin_parent_idx, self._pin_child_idx,
+                                  self._pin_locA, self._pin_locB, self._pin_locP,
+                                  self._weld_parent_idx, self._weld_child_idx,
+                                  self._weld_pos, self._weld_ang,
+                                  dci, dpi, dtarget, has_driven, res)
+        c = np.cos(ang, out=self._c)
+        s = np.sin(ang, out=self._s)
+        pos = self._link_pos
+        k = 0
+        if len(self._rev_parent_idx):
+            pi = self._rev_parent_idx
+            ci = self._rev_child_idx
+            lp = self._rev_ptP
+            lc = self._rev_ptC
+            block = res[k:k + 2*len(pi)].reshape(-1, 2)
+            block[:, 0] = (pos[pi, 0] + c[pi]*lp[:, 0] - s[pi]*lp[:, 1]
+                           - pos[ci, 0] - c[ci]*lc[:, 0] + s[ci]*lc[:, 1])
+            block[:, 1] = (pos[pi, 1] + s[pi]*lp[:, 0] + c[pi]*lp[:, 1]
+                           - pos[ci, 1] - s[ci]*lc[:, 0] - c[ci]*lc[:, 1])
+            k += 2*len(pi)
+        if len(self._pris_parent_idx):
+            pi = self._pris_parent_idx
+            ci = self._pris_child_idx
+            lp = self._pris_locP
+            lc = self._pris_locC
+            wp = self._pris_angP + ang[pi]
+            wc = self._pris_angC + ang[ci]
+            origin_p_x = c[pi]*lp[:, 0] - s[pi]*lp[:, 1] + pos[pi, 0]
+            origin_p_y = s[pi]*lp[:, 0] + c[pi]*lp[:, 1] + pos[pi, 1]
+            origin_c_x = c[ci]*lc[:, 0] - s[ci]*lc[:, 1] + pos[ci, 0]
+            origin_c_y = s[ci]*lc[:, 0] + c[ci]*lc[:, 1] + pos[ci, 1]
+            vx = origin_c_x - origin_p_x
+            vy = origin_c_y - origin_p_y
+            # Parallel axes, then colinear origins along the parent axis.
+            block = res[k:k + 2*len(pi)].reshape(-1, 2)
+            block[:, 0] = np.sin(wc - wp)
+            block[:, 1] = vx*np.sin(wp) - vy*np.cos(wp)
+            k += 2*len(pi)
+        if len(self._pin_parent_idx):
+            pi = self._pin_parent_idx
+            ci = self._pin_child_idx
+            la = self._pin_locA
+            lb = self._pin_locB
+            lpn = self._pin_locP
+            Ax = c[pi]*la[:, 0] - s[pi]*la[:, 1] + pos[pi, 0]
+            Ay = s[pi]*la[:, 0] + c[pi]*la[:, 1] + pos[pi, 1]
+            Bx = c[pi]*lb[:, 0] - s[pi]*lb[:, 1] + pos[pi, 0]
+            By = s[pi]*lb[:, 0] + c[pi]*lb[:, 1] + pos[pi, 1]
+            Px = c[ci]*lpn[:, 0] - s[ci]*lpn[:, 1] + pos[ci, 0]
+            Py = s[ci]*lpn[:, 0] + c[ci]*lpn[:, 1] + pos[ci, 1]
+            res[k:k + len(pi)] = (Bx-Ax)*(Py-Ay) - (By-Ay)*(Px-Ax)
+            k += len(pi)
+        if len(self._weld_parent_idx):
+            pi = self._weld_parent_idx
+            ci = self._weld_child_idx
+            wpos = self._weld_pos
+            block = res[k:k + 3*len(pi)].reshape(-1, 3)
+            block[:, 0] = c[pi]*wpos[:, 0] - s[pi]*wpos[:, 1] + pos[pi, 0] - pos[ci, 0]
+            block[:, 1] = s[pi]*wpos[:, 0] + c[pi]*wpos[:, 1] + pos[pi, 1] - pos[ci, 1]
+            block[:, 2] = (ang[ci] - ang[pi]) - self._weld_ang
+            k += 3*len(pi)
+        if driven is not None:
+            ci, pi, target_rel_angle = driven
+            res[k] = (ang[ci] - ang[pi]) - target_rel_angle
+        return res
+
+    def jacobian(self, x, driven=None):
+        # Analytic Jacobian of constraint_equations wrt a user-units pose
+        # vector; the chain-rule deg->rad scale is applied to the angle
+        # columns after the internal radian Jacobian is assembled.
+        J = self._jacobian_rad(self._to_internal(x), self._resolve_driven(driven))
+        if self._angle_scale != 1.0:
+            J[:, 2::3] *= self._angle_scale
+        return J
+
+    def _jacobian_rad(self, x, driven=None):
+        # Internal dense Jacobian wrt the radian pose vector.
+        rows, cols, vals, shape = self._jacobian_triplets(x, driven)
+        J = np.zeros(shape)
+        J[rows, cols] = vals
+        return J
+
+    def _jacobian_sparse(self, x, driven=None):
+        # CSR Jacobian for large linkages: each joint couples two links,
+        # so nonzeros grow with the joint count while the dense matrix
+        # grows with (joints x links). Used with tr_solver='lsmr'.
+        rows, cols, vals, shape = self._jacobian_triplets(x, driven)
+        return sparse.csr_matrix((vals, (rows, cols)), shape=shape)
+
+    def jac_sparsity(self, driven=None):
+        # 0/1 nonzero structure, cached per driven link pair (the driven
+        # row's nonzeros sit in that pair's angle columns); useful for
+        # callers that finite-difference some other residual on top of
+        # these constraints.
+        driven = self._resolve_driven(driven)
+        key = None if driven is None else (driven[0], driven[1])
+        if key not in self._jac_sparsity_cache:
+            rows, cols, _, shape = self._jacobian_triplets(
+                self._gather_pose_vector(), driven)
+            self._jac_sparsity_cache[key] = sparse.csr_matrix(
+                (np.ones(len(rows)), (rows, cols)), shape=shape)
+        return self._jac_sparsity_cache[key]
+
+    def _jacobian_triplets(self, x, driven=None):
+        # Jacobian entries in COO form. All constraints are trig in link
+        # angles and linear in positions, so finite differencing
+        # (3*n_free+1 residual evals per iteration) is never needed.
+        self._scatter_pose_vector(x)
+        ang = self._link_ang
+        c = np.cos(ang, out=self._c)
+        s = np.sin(ang, out=self._s)
+        pos = self._link_pos
+        col = {int(li): 3*k for k, li in enumerate(self._nongrounded_idx)}
+        n_vars = 3 * len(self._nongrounded_idx)
+        n_rev = len(self._rev_parent_idx)
+        n_eqs = 2*n_rev + sum({'prismatic': 2, 'pin-in-slot': 1, 'weld': 3}[e[0]]
+                              for e in self._other_joints)
+        if driven is not None:
+            n_eqs += 1
+        rows, cols, vals = [], [], []
+
+        def put(r, c_, v):
+            rows.append(r)
+            cols.append(c_)
+            vals.append(v)
+
+        row = 0
+        for k in range(n_rev):
+            pi = int(self._rev_parent_idx[k])
+            ci = int(self._rev_child_idx[k])
+            lx, ly = self._rev_ptP[k]
+            if pi in col:
+                j = col[pi]
+                put(row, j, 1.0)
+                put(row+1, j+1, 1.0)
+                put(row, j+2, (-s[pi]*lx - c[pi]*ly))
+                put(row+1, j+2, (c[pi]*lx - s[pi]*ly))
+            lx, ly = self._rev_ptC[k]
+            if ci in col:
+                j = col[ci]
+                put(row, j, -1.0)
+                put(row+1, j+1, -1.0)
+                put(row, j+2, -(-s[ci]*lx - c[ci]*ly))
+                put(row+1, j+2, -(c[ci]*lx - s[ci]*ly))
+            row += 2
+        for entry in self._other_joints:
+            jtype = entry[0]
+            if jtype == 'prismatic':
+                _, pi, ci, axis_pt_p, axis_ang_p, axis_pt_c, axis_ang_c = entry
+                wp = axis_ang_p + ang[pi]
+                wc = axis_ang_c + ang[ci]
+                swp, cwp = math.sin(wp), math.cos(wp)
+                dRp = (-s[pi]*axis_pt_p[0] - c[pi]*axis_pt_p[1],
+                       c[pi]*axis_pt_p[0] - s[pi]*axis_pt_p[1])
+                dRc = (-s[ci]*axis_pt_c[0] - c[ci]*axis_pt_c[1],
+                       c[ci]*axis_pt_c[0] - s[ci]*axis_pt_c[1])
+                origin_p = (c[pi]*axis_pt_p[0] - s[pi]*axis_pt_p[1] + pos[pi, 0],
+                            s[pi]*axis_pt_p[0] + c[pi]*axis_pt_p[1] + pos[pi, 1])
+                origin_c = (c[ci]*axis_pt_c[0] - s[ci]*axis_pt_c[1] + pos[ci, 0],
+                            s[ci]*axis_pt_c[0] + c[ci]*axis_pt_c[1] + pos[ci, 1])
+                vx = origin_c[0] - origin_p[0]
+                vy = origin_c[1] - origin_p[1]
+                if pi in col:
+                    j = col[pi]
+                    put(row, j+2, -math.cos(wc - wp))
+                    put(row+1, j, -swp)
+                    put(row+1, j+1, cwp)
+                    put(row+1, j+2, (-dRp[0]*swp + dRp[1]*cwp + vx*cwp + vy*swp))
+                if ci in col:
+                    j = col[ci]
+                    put(row, j+2, math.cos(wc - wp))
+                    put(row+1, j, swp)
+                    put(row+1, j+1, -cwp)
+                    put(row+1, j+2, (dRc[0]*swp - dRc[1]*cwp))
+                row += 2
+            elif jtype == 'pin-in-slot':
+                _, pi, ci, ptA, ptB, pin = entry
+                dab = ptB - ptA
+                ABx = c[pi]*dab[0] - s[pi]*dab[1]
+                ABy = s[pi]*dab[0] + c[pi]*dab[1]
+                A = (c[pi]*ptA[0] - s[pi]*ptA[1] + pos[pi, 0],
+                     s[pi]*ptA[0] + c[pi]*ptA[1] + pos[pi, 1])
+                P = (c[ci]*pin[0] - s[ci]*pin[1] + pos[ci, 0],
+                     s[ci]*pin[0] + c[ci]*pin[1] + pos[ci, 1])
+                APx = P[0] - A[0]
+                APy = P[1] - A[1]
+                if ci in col:
+                    j = col[ci]
+                    put(row, j, -ABy)
+                    put(row, j+1, ABx)
+                    dP = (-s[ci]*pin[0] - c[ci]*pin[1], c[ci]*pin[0] - s[ci]*pin[1])
+                    put(row, j+2, (ABx*dP[1] - ABy*dP[0]))
+                if pi in col:
+                    j = col[pi]
+                    put(row, j, ABy)
+                    put(row, j+1, -ABx)
+                    dAB = (-s[pi]*dab[0] - c[pi]*dab[1], c[pi]*dab[0] - s[pi]*dab[1])
+                    dA = (-s[pi]*ptA[0] - c[pi]*ptA[1], c[pi]*ptA[0] - s[pi]*ptA[1])
+                    put(row, j+2, (dAB[0]*APy + ABx*(-dA[1]) - dAB[1]*APx - ABy*(-dA[0])))
+                row += 1
+            elif jtype == 'weld':
+                _, pi, ci, rel_pos, rel_angle = entry
+                if pi in col:
+                    j = col[pi]
+                    put(row, j, 1.0)
+                    put(row+1, j+1, 1.0)
+                    put(row, j+2, (-s[pi]*rel_pos[0] - c[pi]*rel_pos[1]))
+                    put(row+1, j+2, (c[pi]*rel_pos[0] - s[pi]*rel_pos[1]))
+                    put(row+2, j+2, -1.0)
+                if ci in col:
+                    j = col[ci]
+                    put(row, j, -1.0)
+                    put(row+1, j+1, -1.0)
+                    put(row+2, j+2, 1.0)
+                row += 3
+        if driven is not None:
+            ci, pi, _ = driven
+            if ci in col:
+                put(row, col[ci]+2, 1.0)
+            if pi in col:
+                put(row, col[pi]+2, -1.0)
+        return rows, cols, vals, (n_eqs, n_vars)
+
+    def solve_linkage(self, driven=None, initial_pose=None, method=None,
+                      backend='scipy', verbose=0):
+        # Solve for the free link poses and write them back to the link
+        # dicts; returns the converged pose vector.
+        if initial_pose is not None:
+            x0 = self._to_internal(initial_pose)
+        elif self._last_x is not None:
+            x0 = self._last_x
+        else:
+            x0 = self._gather_pose_vector()
+        driven = self._resolve_driven(driven)
+        if backend == 'numba_lm':
+            # In-house damped LM loop (see _fast.lm_solve): one residual
+            # and one Jacobian call per iteration, no scipy bookkeeping
+            # between them. Worthwhile for tight solve loops (animation
+            # frames) where the kernels themselves run in microseconds.
+            x = lm_solve(lambda x: self._residuals(x, driven=driven),
+                         lambda x: self._jacobian_rad(x, driven=driven), x0)
+            self._last_x = x.copy()
+            self._scatter_pose_vector(x)
+            self._write_back_poses()
+            return self._to_user(x)
+        if method is None:
+            # MINPACK Levenberg-Marquardt is cheaper per iteration than the
+            # default trust-region method for the small dense systems typical
+            # here, but needs at least as many residuals as variables.
+            n_eqs = self._n_base_residuals + (1 if driven is not None else 0)
+            method = 'lm' if n_eqs >= x0.size else 'trf'
+        if method == 'lm':
+            # least_squares rejects verbose=2 for the MINPACK wrapper.
+            verbose = min(verbose, 1)
+        if method != 'lm' and x0.size >= 60:
+            # Each joint couples at most two links, so above ~20 free
+            # links the Jacobian is mostly zeros; hand least_squares the
+            # CSR form and the matrix-free LSMR trust-region solver so
+            # cost scales with the nonzero count instead of n^2.
+            res = least_squares(lambda x: self._residuals(x, driven=driven), x0,
+                                jac=lambda x: self._jacobian_sparse(x, driven=driven),
+                                method=method, tr_solver='lsmr', verbose=verbose)
+        else:
+            res = least_squares(lambda x: self._residuals(x, driven=driven), x0,
+                                jac=lambda x: self._jacobian_rad(x, driven=driven),
+                                method=method, verbose=verbose)
+        if res.success:
+            self._last_x = res.x.copy()
+        self._scatter_pose_vector(res.x)
+        self._write_back_poses()
+        return self._to_user(res.x)
+
+    def _write_back_poses(self):
+        for i in self._nongrounded_idx:
+            link = self.links[i]
+            link['pose']['position'] = [float(self._link_pos[i, 0]), float(self._link_pos[i, 1])]
+            link['pose']['angle'] = float(self._link_ang[i] / self._angle_scale)
@@ -1,20 +1,29 @@
 import json
 import numpy as np
-from scipy.optimize import least_squares
 import math
 
+from ._fast import transform_batch, transform_point_scalar
+from .linkage2d import Linkage2D, _load_json
+
 def transform_point(local_pos, pose, unit_angle='deg'):
     x, y = local_pos
     angle = pose.get('angle', 0)
     if unit_angle == 'deg':
         angle = math.radians(angle)
-    cos_a = math.cos(angle)
-    sin_a = math.sin(angle)
     tx, ty = pose.get('position', [0, 0])
-    wx = cos_a * x - sin_a * y + tx
-    wy = sin_a * x + cos_a * y + ty
+    wx, wy = transform_point_scalar(x, y, tx, ty, math.cos(angle), math.sin(angle))
     return [wx, wy]
 
+def transform_points_batch(local_xy, pose, unit_angle='deg'):
+    # Batched version of transform_point: takes an (N,2) array of link-local
+    # coordinates and applies the rotation + translation in one NumPy call.
+    local_xy = np.asarray(local_xy, dtype=float).reshape(-1, 2)
+    angle = pose.get('angle', 0)
+    if unit_angle == 'deg':
+        angle = math.radians(angle)
+    tx, ty = pose.get('position', [0, 0])
+    return transform_batch(local_xy, float(tx), float(ty), float(angle))
+
 def get_link_pose_vector(links):
     pose_vec = []
     non_grounded_indices = []
@@ -34,7 +43,13 @@ def set_link_poses_from_vector(links, pose_vec, non_grounded_indices):
 
 
 def constraint_equations(pose_vec, links, joints, grounded_mask, driven=None):
-    set_link_poses_from_vector(links, pose_vec, [i for i, g in enumerate(grounded_mask) if not g])
+    # Legacy reference implementation, kept for cross-checking the
+    # Linkage2D kernel. solve_linkage no longer calls this: it writes the
+    # pose vector back into the link dicts and re-resolves every id on
+    # every evaluation, which is exactly the per-call marshaling the SoA
+    # state on Linkage2D avoids. New code should go through Linkage2D.
+    set_link_poses_from_vector(links, pose_vec,
+                               np.flatnonzero(~np.asarray(grounded_mask, dtype=bool)))
     eqs = []
     unit_angle = constraint_equations.unit_angle if hasattr(constraint_equations, 'unit_angle') else 'deg'
     for joint in joints:
@@ -78,15 +93,18 @@ def constraint_equations(pose_vec, links, joints, grounded_mask, driven=None):
                 child_pose_angle = math.radians(child_pose_angle)
             world_axis_angle_p = axis_angle_p + parent_pose_angle
             world_axis_angle_c = axis_angle_c + child_pose_angle
-            dir_vec_p = np.array([math.cos(world_axis_angle_p), math.sin(world_axis_angle_p)])
-            dir_vec_c = np.array([math.cos(world_axis_angle_c), math.sin(world_axis_angle_c)])
+            # Plain scalars throughout: wrapping each 2-vector in np.array
+            # costs ~1us of per-array overhead, which dwarfs the arithmetic.
+            dpx, dpy = math.cos(world_axis_angle_p), math.sin(world_axis_angle_p)
+            dcx, dcy = math.cos(world_axis_angle_c), math.sin(world_axis_angle_c)
             axis_origin_p = transform_point(axis_point_p['position'], parent_link['pose'], unit_angle)
             axis_origin_c = transform_point(axis_point_c['position'], child_link['pose'], unit_angle)
-            v = np.array(axis_origin_c) - np.array(axis_origin_p)
+            vx = axis_origin_c[0] - axis_origin_p[0]
+            vy = axis_origin_c[1] - axis_origin_p[1]
             # Constraint 1: directions must be parallel (cross product = 0)
-            eqs.append(dir_vec_p[0]*dir_vec_c[1] - dir_vec_p[1]*dir_vec_c[0])
+            eqs.append(dpx*dcy - dpy*dcx)
             # Constraint 2: axis origins must be colinear along axis direction (cross product = 0)
-            eqs.append(v[0]*dir_vec_p[1] - v[1]*dir_vec_p[0])
+            eqs.append(vx*dpy - vy*dpx)
         elif joint['type'] == 'pin-in-slot':
             parent_id = joint['parent']
             child_id = joint['child']
@@ -99,14 +117,12 @@ def constraint_equations(pose_vec, links, joints, grounded_mask, driven=None):
             ptA_id, ptB_id = line['point_ids']
             ptA = next(p for p in parent_link['points'] if p['id'] == ptA_id)
             ptB = next(p for p in parent_link['points'] if p['id'] == ptB_id)
-            A = np.array(transform_point(ptA['position'], parent_link['pose'], unit_angle))
-            B = np.array(transform_point(ptB['position'], parent_link['pose'], unit_angle))
+            A = transform_point(ptA['position'], parent_link['pose'], unit_angle)
+            B = transform_point(ptB['position'], parent_link['pose'], unit_angle)
             pin = next(p for p in child_link['points'] if p['id'] == point_id)
-            P = np.array(transform_point(pin['position'], child_link['pose'], unit_angle))
+            P = transform_point(pin['position'], child_link['pose'], unit_angle)
             # Constraint: P must be on line AB (cross product = 0)
-            AB = B - A
-            AP = P - A
-            cross = AB[0]*AP[1] - AB[1]*AP[0]
+            cross = (B[0]-A[0])*(P[1]-A[1]) - (B[1]-A[1])*(P[0]-A[0])
             eqs.append(cross)
         elif joint['type'] == 'weld':
             parent_id = joint['parent']
@@ -137,39 +153,32 @@ def constraint_equations(pose_vec, links, joints, grounded_mask, driven=None):
         child_link = next(l for l in links if l['id'] == child_id)
         parent_angle = parent_link['pose']['angle']
         child_angle = child_link['pose']['angle']
-        if unit_angle == 'deg':
-            eqs.append((child_angle - parent_angle) - target_rel_angle)
-        else:
-            eqs.append((child_angle - parent_angle) - target_rel_angle)
+        # The relative-angle residual is unit-agnostic: both poses and the
+        # target share the document's unit_angle convention.
+        eqs.append((child_angle - parent_angle) - target_rel_angle)
     return np.array(eqs)
 
-def solve_linkage(json_file_or_data, driven=None, initial_pose=None):
+def solve_linkage(json_file_or_data, driven=None, initial_pose=None, method=None):
     # Accept either a filename or a data dict
     if isinstance(json_file_or_data, str):
-        with open(json_file_or_data, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = _load_json(json_file_or_data)
         json_file = json_file_or_data
     else:
         data = json_file_or_data
         json_file = None
-    links = data['links']
-    joints = data['joints']
-    unit_angle = data.get('unit_angle', 'deg')
-    pose_vec, non_grounded_indices = get_link_pose_vector(links)
-    if initial_pose is not None:
-        pose_vec = initial_pose.copy()
-    def fun(x):
-        set_link_poses_from_vector(links, x, non_grounded_indices)
-        constraint_equations.unit_angle = unit_angle
-        return constraint_equations(x, links, joints, [i not in non_grounded_indices for i in range(len(links))], driven=driven) if driven is not None else constraint_equations(x, links, joints, [i not in non_grounded_indices for i in range(len(links))])
-    x0 = pose_vec.copy()
-    res = least_squares(fun, x0, verbose=2)
-    set_link_poses_from_vector(links, res.x, non_grounded_indices)
-    data['links'] = links
+    # The Linkage2D wrapper keeps pose state in NumPy buffers mutated in
+    # place, so the residual evaluations inside least_squares no longer
+    # rebuild Python lists and floats per call; link dicts are updated
+    # once after convergence.
+    linkage = Linkage2D(data)
+    # method=None picks 'lm' or 'trf' from the system shape; see
+    # Linkage2D.solve_linkage.
+    x = linkage.solve_linkage(driven=driven, initial_pose=initial_pose,
+                              method=method, verbose=2)
     if json_file:
         with open('solved_'+json_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2)
         print(f'Solved linkage saved to solved_{json_file}')
         return data
     else:
-        return data, res.x
+        return data, x
@@ -1,16 +1,37 @@
 #!/usr/bin/env python3
+import functools
 import json, sys
-from jsonschema import validate, Draft202012Validator
+from jsonschema import Draft202012Validator
 from jsonschema.exceptions import ValidationError
 
+try:
+    import orjson
+
+    def _load_json(path: str):
+        # orjson parses 3-5x faster than stdlib json and returns the same
+        # dict/list structure, so downstream code is unaffected.
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+except ImportError:
+    def _load_json(path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+@functools.lru_cache(maxsize=None)
+def get_validator(schema_path: str) -> Draft202012Validator:
+    # Build the validator once per schema file. Constructing it through
+    # jsonschema.validate() redoes meta-schema resolution on every call,
+    # which dominates when validating many linkage files in a batch.
+    schema = _load_json(schema_path)
+    Draft202012Validator.check_schema(schema)
+    return Draft202012Validator(schema)
+
 def main(schema_path: str, data_path: str) -> int:
-    with open(schema_path, "r", encoding="utf-8") as f:
-        schema = json.load(f)
-    with open(data_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    validator = get_validator(schema_path)
+    data = _load_json(data_path)
 
     try:
-        validate(instance=data, schema=schema, cls=Draft202012Validator)
+        validator.validate(data)
         print(f"VALID: {data_path} conforms to {schema_path}")
         return 0
     except ValidationError as e: